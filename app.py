@@ -20,6 +20,13 @@
 #        - Fix bug: Directory browse dialog does not show files
 # 1.2.3  - Fix bug: Error converting path with space(s)
 # 1.3.0  - Add feature: mode output - sRGB for converting ACEScg --> sRGB matching exact color
+#        - Add feature: show resolution and bit depth from image header, estimated output size and time
+#        - Add feature: convert files in parallel within a memory budget estimated from image size
+#        - Add feature: conversion journal, offer to resume unfinished conversion of the directory
+#        - Update: faster startup, import pipeline modules on first use and reuse window in Maya/Nuke
+#        - Add feature: verify output header and sampled pixels, retry bad files
+#        - Add feature: batch backend, convert small files of a group in one process loading OCIO config once
+#        - Add feature: preview thumbnails of visible rows loaded in background with disk cache
 
 _title = 'ACES Converter'
 _version = '1.2.3'
@@ -39,20 +46,55 @@ import getpass
 import shutil
 import fnmatch
 import subprocess
+import struct
+import threading
+import multiprocessing
+import json
+import hashlib
+import time
+import importlib
 from datetime import datetime
 from functools import partial
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict, defaultdict, namedtuple
+from multiprocessing.pool import ThreadPool
 
 # import config
 import rf_config as config
 
+_lazy_lock = threading.Lock()
+
+class LazyModule(object):
+    ''' Import module on first attribute access, keeps tool startup fast inside host apps '''
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            with _lazy_lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+class LazyLogger(object):
+    ''' Set up the log file on first log call '''
+    def __init__(self):
+        self._logger = None
+
+    def __getattr__(self, attr):
+        if self._logger is None:
+            with _lazy_lock:
+                if self._logger is None:
+                    from rf_utils import log_utils
+                    user = '{}-{}'.format(config.Env.localuser, getpass.getuser()) or 'unknown'
+                    logFile = log_utils.name(uiName, user)
+                    log = log_utils.init_logger(logFile)
+                    log.setLevel(logging.DEBUG)
+                    self._logger = log
+        return getattr(self._logger, attr)
+
 # logging
-from rf_utils import log_utils
-from rf_utils.ui import stylesheet
-user = '{}-{}'.format(config.Env.localuser, getpass.getuser()) or 'unknown'
-logFile = log_utils.name(uiName, user)
-logger = log_utils.init_logger(logFile)
-logger.setLevel(logging.DEBUG)
+logger = LazyLogger()
 
 # QT
 os.environ['QT_PREFERRED_BINDING'] = os.pathsep.join(['PySide', 'PySide2'])
@@ -61,14 +103,29 @@ from Qt import QtWidgets
 from Qt import QtGui
 from Qt import QtCompat
 
-# pipeline modules
-from rf_utils.oiio import run_oiio
-from rf_utils.widget.file_widget import Icon
-from rf_utils import thread_pool
-from rf_utils import file_utils
-from rf_utils import admin
-from rf_utils import fileTexturePathResolver as tex_resolver
-from rf_utils.context import context_info
+# pipeline modules, imported on first use
+run_oiio = LazyModule('rf_utils.oiio.run_oiio')
+file_widget = LazyModule('rf_utils.widget.file_widget')
+stylesheet = LazyModule('rf_utils.ui.stylesheet')
+thread_pool = LazyModule('rf_utils.thread_pool')
+file_utils = LazyModule('rf_utils.file_utils')
+admin = LazyModule('rf_utils.admin')
+tex_resolver = LazyModule('rf_utils.fileTexturePathResolver')
+context_info = LazyModule('rf_utils.context.context_info')
+
+def env_int(name, default):
+    ''' Return integer environment variable, default if it's not set or not a positive integer '''
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        value = 0
+    if value <= 0:
+        logger.warning('Invalid {}={!r}, use default {}'.format(name, os.environ.get(name), default))
+        return default
+    return value
 
 moduleDir = os.path.dirname(sys.modules[__name__].__file__).replace('\\', '/')
 ACES_MAP_HINT = ['.exr']
@@ -77,6 +134,815 @@ COLOR_MAPS_HINT = ['diffuse', 'albedo', 'specular', 'reflection']
 PLATE_MAPS_HINT = ['backplate']
 ACES_EXT = '.exr'
 SRGB_EXT = '.png'
+APP_DATA_DIR = '{}/.aces_converter'.format(os.path.expanduser('~').replace('\\', '/'))
+JOURNAL_DIR = '{}/journals'.format(APP_DATA_DIR)
+THUMB_DIR = '{}/thumbs'.format(APP_DATA_DIR)
+
+# image header probe
+PROBE_THREADS = 8
+PROBE_MAX_HEADER = 65536
+PROBE_MAX_CHANNELS = 1024
+# output estimate: bytes per channel and rough compression ratio of the written file
+OUTPUT_BYTES_PER_CHANNEL = {ACES_EXT: 2, SRGB_EXT: 1}
+OUTPUT_COMPRESSION = {ACES_EXT: 0.6, SRGB_EXT: 0.5}
+# time estimate: backend throughput and per file overhead (process start, OCIO config load)
+CONVERT_MPIXELS_PER_SEC = 20.0
+CONVERT_FILE_OVERHEAD = 1.5
+# memory admission control, budget can be overridden with ACES_CONVERTER_MEMORY_MB
+MEMORY_BUDGET_MB = env_int('ACES_CONVERTER_MEMORY_MB', 8192)
+MAX_CONVERT_WORKERS = max(1, multiprocessing.cpu_count() - 1)
+CONVERT_PROCESS_MEMORY = 200 * 1024 * 1024  # backend process with OCIO config loaded
+DEFAULT_MEMORY_ESTIMATE = 1024 * 1024 * 1024  # used when image header can't be read
+# output verification
+VERIFY_RETRIES = 2
+VERIFY_SAMPLE_ROWS = 16
+VERIFY_SAMPLE_COLUMNS = 256
+# expected (min, max) of values of each map type transform for 8/16-bit sources
+VERIFY_RANGES = {('Utility - Raw', 'ACES - ACEScg'): (0.0, 1.0), 
+                ('Utility - sRGB - Texture', 'ACES - ACEScg'): (0.0, 1.0), 
+                ('Utility - Linear - sRGB', 'ACES - ACEScg'): (-0.05, 1.0), 
+                # inverse output transform lifts sRGB white to ~16.3
+                ('Output - sRGB', 'ACES - ACEScg'): (0.0, 16.3), 
+                ('ACES - ACEScg', 'Output - sRGB'): (0.0, 1.0)}
+VERIFY_HALF_MAX = 65504.0
+VERIFY_TOLERANCE = 0.01
+# how the output mean follows the sampled source mean, the sRGB to AP1 matrix keeps white so the
+# channel mean is kept within a few percent. Output transforms are tone curves and are not modelled.
+VERIFY_MEAN_MODELS = {('Utility - Raw', 'ACES - ACEScg'): 'identity', 
+                    ('Utility - sRGB - Texture', 'ACES - ACEScg'): 'srgb', 
+                    ('Utility - Linear - sRGB', 'ACES - ACEScg'): 'identity'}
+VERIFY_MEAN_TOLERANCE = 0.15  # relative deviation from expected mean
+VERIFY_MEAN_MIN_DEVIATION = 0.02  # absolute, for dark images
+# batched backend, small files of the same group share one process and OCIO config load
+BATCH_CHUNK_SIZE = 16
+BATCH_MAX_PIXELS = 2048 * 2048
+BATCH_FILE_OVERHEAD = 0.1
+BATCH_SCRIPT = '{}/batch_convert.py'.format(moduleDir)
+# thumbnails
+THUMB_SIZE = 64
+THUMB_ICON_SIZE = 32
+THUMB_THREADS = 2
+THUMB_CACHE_MAX_MB = 256
+THUMB_REQUEST_DELAY = 100  # ms, wait for scrolling to settle
+# colorspace of HDR sources, their previews are transformed to THUMB_DISPLAY_CS by the batch backend
+THUMB_SOURCE_CS = {'.exr': 'ACES - ACEScg', '.hdr': 'Utility - Linear - sRGB'}
+THUMB_DISPLAY_CS = 'Output - sRGB'
+
+ImageInfo = namedtuple('ImageInfo', ['width', 'height', 'channels', 'bits', 'is_float'])
+_image_info_cache = {}  # {(path, mtime, size): ImageInfo}
+_image_info_lock = threading.Lock()
+
+def _probe_png(f):
+    header = f.read(26)
+    if len(header) < 26 or header[12:16] != b'IHDR':
+        return
+    width, height, bits, color_type = struct.unpack('>IIBB', header[16:26])
+    channels = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}.get(color_type, 3)
+    return ImageInfo(width, height, channels, bits, False)
+
+def _probe_jpeg(f):
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return
+        marker = ord(byte)
+        if marker in (0x01, 0xd8) or 0xd0 <= marker <= 0xd7:
+            continue
+        if marker == 0xd9:
+            return
+        length_data = f.read(2)
+        if len(length_data) < 2:
+            return
+        length = struct.unpack('>H', length_data)[0]
+        # start of frame markers, excluding DHT, JPG and DAC
+        if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+            data = f.read(6)
+            if len(data) < 6:
+                return
+            bits, height, width, channels = struct.unpack('>BHHB', data)
+            return ImageInfo(width, height, channels, bits, False)
+        f.seek(length - 2, 1)
+
+def _probe_tiff(f):
+    header = f.read(8)
+    endian = '<' if header[:2] == b'II' else '>'
+    magic, ifd_offset = struct.unpack(endian + 'HI', header[2:8])
+    if magic != 42:  # BigTIFF is not supported
+        return
+    f.seek(ifd_offset)
+    num_entries = struct.unpack(endian + 'H', f.read(2))[0]
+    tags = {}
+    for _ in range(num_entries):
+        entry = f.read(12)
+        if len(entry) < 12:
+            break
+        tag, typ, count = struct.unpack(endian + 'HHI', entry[:8])
+        if typ == 3:  # SHORT, first value only
+            value = struct.unpack(endian + 'H', entry[8:10])[0]
+            if count > 2:
+                pos = f.tell()
+                f.seek(struct.unpack(endian + 'I', entry[8:12])[0])
+                value = struct.unpack(endian + 'H', f.read(2))[0]
+                f.seek(pos)
+        elif typ == 4:  # LONG
+            value = struct.unpack(endian + 'I', entry[8:12])[0]
+        else:
+            continue
+        tags[tag] = value
+    if 256 not in tags or 257 not in tags:
+        return
+    # 256: ImageWidth, 257: ImageLength, 258: BitsPerSample, 277: SamplesPerPixel, 339: SampleFormat
+    return ImageInfo(tags[256], tags[257], tags.get(277, 1), tags.get(258, 1), tags.get(339) == 3)
+
+def _probe_exr(f):
+    data = f.read(PROBE_MAX_HEADER)
+    pos = 8
+    width = height = None
+    channel_types = []
+    while pos < len(data):
+        end = data.find(b'\x00', pos)
+        if end == -1:
+            return
+        name = data[pos:end]
+        if not name:  # end of header
+            break
+        type_end = data.find(b'\x00', end + 1)
+        if type_end == -1 or type_end + 5 > len(data):
+            return
+        size = struct.unpack('<i', data[type_end+1:type_end+5])[0]
+        value = data[type_end+5:type_end+5+size]
+        pos = type_end + 5 + size
+        if name == b'dataWindow' and len(value) == 16:
+            xmin, ymin, xmax, ymax = struct.unpack('<iiii', value)
+            width, height = xmax - xmin + 1, ymax - ymin + 1
+        elif name == b'channels':
+            cpos = 0
+            while cpos < len(value) and value[cpos:cpos+1] != b'\x00':
+                cend = value.find(b'\x00', cpos)
+                # truncated or corrupt channel list
+                if cend == -1 or cend + 17 > len(value) or len(channel_types) >= PROBE_MAX_CHANNELS:
+                    return
+                # pixel type (0: uint, 1: half, 2: float), pLinear, reserved, xSampling, ySampling
+                channel_types.append(struct.unpack('<i', value[cend+1:cend+5])[0])
+                cpos = cend + 17
+    if width is None or not channel_types:
+        return
+    pixel_type = max(channel_types)
+    bits = 16 if pixel_type == 1 else 32
+    return ImageInfo(width, height, len(channel_types), bits, pixel_type != 0)
+
+def _probe_hdr(f):
+    data = f.read(PROBE_MAX_HEADER)
+    header_end = data.find(b'\n\n')
+    if header_end == -1:
+        return
+    res_line = data[header_end+2:].split(b'\n', 1)[0].split()
+    if len(res_line) != 4:
+        return
+    # resolution line is either "-Y height +X width" or "+X width -Y height" (rotated)
+    if res_line[0][1:2] == b'Y':
+        height, width = int(res_line[1]), int(res_line[3])
+    else:
+        width, height = int(res_line[1]), int(res_line[3])
+    return ImageInfo(width, height, 3, 32, True)
+
+def probe_image(path):
+    ''' Read resolution, channels and bit depth of an image from its header only '''
+    try:
+        with open(path, 'rb') as f:
+            magic = f.read(8)
+            f.seek(0)
+            if magic.startswith(b'\x89PNG'):
+                return _probe_png(f)
+            elif magic.startswith(b'\xff\xd8'):
+                return _probe_jpeg(f)
+            elif magic[:4] in (b'II*\x00', b'MM\x00*'):
+                return _probe_tiff(f)
+            elif magic.startswith(b'\x76\x2f\x31\x01'):
+                return _probe_exr(f)
+            elif magic.startswith(b'#?'):
+                return _probe_hdr(f)
+    except (IOError, OSError, struct.error, ValueError):
+        pass
+
+def get_image_stat(path):
+    ''' Return (mtime, size, ImageInfo) of path, header probe is cached by path+mtime+size '''
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, None, None
+    key = (path, st.st_mtime, st.st_size)
+    with _image_info_lock:
+        if key in _image_info_cache:
+            return st.st_mtime, st.st_size, _image_info_cache[key]
+    info = probe_image(path)
+    with _image_info_lock:
+        _image_info_cache[key] = info
+    return st.st_mtime, st.st_size, info
+
+def describe_image_info(info):
+    if not info:
+        return ''
+    if info.is_float:
+        depth = '16-bit half' if info.bits == 16 else '{}-bit float'.format(info.bits)
+    else:
+        depth = '{}-bit'.format(info.bits)
+    return '{}x{} {}'.format(info.width, info.height, depth)
+
+def is_batchable(info):
+    return bool(info) and info.width * info.height <= BATCH_MAX_PIXELS
+
+def estimate_output(info, dest_ext):
+    ''' Return (estimated output bytes, estimated convert seconds) of an image '''
+    if not info:
+        return 0, CONVERT_FILE_OVERHEAD
+    pixels = info.width * info.height
+    raw_size = pixels * info.channels * OUTPUT_BYTES_PER_CHANNEL.get(dest_ext, 2)
+    size = int(raw_size * OUTPUT_COMPRESSION.get(dest_ext, 1.0))
+    overhead = BATCH_FILE_OVERHEAD if is_batchable(info) and _batch_backend['available'] else CONVERT_FILE_OVERHEAD
+    seconds = overhead + (pixels / 1000000.0) / CONVERT_MPIXELS_PER_SEC
+    return size, seconds
+
+def estimate_memory(info, factor=1.0):
+    ''' Return estimated peak memory in bytes of converting an image '''
+    if not info:
+        return DEFAULT_MEMORY_ESTIMATE
+    pixels = info.width * info.height
+    # source buffer + float working buffer + float output buffer before write
+    per_pixel = info.channels * (info.bits / 8.0 + 8)
+    return int(CONVERT_PROCESS_MEMORY + pixels * per_pixel * factor)
+
+class MemoryScheduler(object):
+    ''' Hand out jobs only while their total estimated memory stays under the budget '''
+    def __init__(self, jobs, budget):
+        # jobs: [(estimate, job)], biggest first so small jobs fill the capacity left around them
+        self.pending = sorted(jobs, key=lambda j: j[0], reverse=True)
+        self.budget = budget
+        self.in_use = 0
+        self.running = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        ''' Block until a job fits the budget, return (estimate, job) or (0, None) when done '''
+        with self.condition:
+            while self.pending:
+                for i, (estimate, job) in enumerate(self.pending):
+                    # a job bigger than the whole budget still runs, but alone
+                    if self.in_use + estimate <= self.budget or not self.running:
+                        del self.pending[i]
+                        self.in_use += estimate
+                        self.running += 1
+                        return estimate, job
+                self.condition.wait()
+            return 0, None
+
+    def release(self, estimate):
+        with self.condition:
+            self.in_use -= estimate
+            self.running -= 1
+            self.condition.notify_all()
+
+class ConvertJournal(object):
+    ''' Write-ahead journal of a conversion batch, one JSON record per line appended atomically '''
+    QUEUED = 'queued'
+    CONVERTING = 'converting'
+    CONVERTED = 'converted'
+    PUBLISHED = 'published'
+    FAILED = 'failed'
+
+    def __init__(self, directory):
+        self.directory = directory
+        key = hashlib.md5(directory.lower().encode('utf-8')).hexdigest()
+        self.path = '{}/{}.jsonl'.format(JOURNAL_DIR, key)
+        self.lock = threading.Lock()
+        self._file = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _write(self, records):
+        # one write call per batch of records then fsync, a crash can only tear the last line
+        data = ''.join([json.dumps(r) + '\n' for r in records])
+        with self.lock:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def start(self, temp_dir, file_paths):
+        ''' Begin a new batch, file_paths: {title: {mode:mode, files:[f1, ..., fn]}} '''
+        if not os.path.exists(JOURNAL_DIR):
+            os.makedirs(JOURNAL_DIR)
+        self.close()
+        self._file = open(self.path, 'w')
+        records = [{'directory': self.directory, 'temp_dir': temp_dir}]
+        for title, file_data in file_paths.items():
+            for src in file_data['files']:
+                records.append({'src': src, 'title': title, 'mode': file_data['mode'], 'state': self.QUEUED})
+        self._write(records)
+
+    def record(self, src, state):
+        if self._file:
+            self._write([{'src': src, 'state': state}])
+
+    def read(self):
+        ''' Return (header, {src: {title, mode, state}}) with the last recorded state of each file '''
+        header = {}
+        entries = OrderedDict()
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:  # torn line from a crash
+                    continue
+                if 'directory' in record:
+                    header = record
+                elif record.get('src') in entries:
+                    entries[record['src']]['state'] = record['state']
+                elif 'title' in record:
+                    entries[record['src']] = record
+        return header, entries
+
+    def unfinished(self):
+        ''' Return (header, num_files, {title: {mode:mode, files:[f1, ..., fn]}}) of files not yet published '''
+        header, entries = self.read()
+        file_paths = OrderedDict()
+        for src, entry in entries.items():
+            if entry['state'] == self.PUBLISHED or not os.path.exists(src):
+                continue
+            if entry['title'] not in file_paths:
+                file_paths[entry['title']] = {'mode': entry['mode'], 'files': []}
+            file_paths[entry['title']]['files'].append(src)
+        return header, len(entries), file_paths
+
+    def close(self):
+        with self.lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+_sampler_modules = []
+
+def get_sampler_modules():
+    ''' Return (OpenImageIO, numpy) or None if they are not available in this python '''
+    if not _sampler_modules:
+        try:
+            import OpenImageIO
+            import numpy
+            _sampler_modules.append((OpenImageIO, numpy))
+        except ImportError:
+            logger.warning('OpenImageIO or numpy not found, output verification checks image header only')
+            _sampler_modules.append(None)
+    return _sampler_modules[0]
+
+def sample_pixels(path):
+    ''' Return float pixels of evenly spaced scanlines and columns as array (rows, columns, channels) '''
+    modules = get_sampler_modules()
+    if not modules:
+        return
+    oiio, np = modules
+    inp = oiio.ImageInput.open(path)
+    if not inp:
+        raise IOError(oiio.geterror())
+    try:
+        spec = inp.spec()
+        # always include the last scanline so truncated files fail
+        ys = np.unique(np.linspace(spec.y, spec.y + spec.height - 1, VERIFY_SAMPLE_ROWS).astype(int))
+        step = max(1, spec.width // VERIFY_SAMPLE_COLUMNS)
+        rows = []
+        for y in ys:
+            row = inp.read_scanline(int(y), spec.z, 'float')
+            if row is None:
+                raise IOError('Cannot read scanline {}: {}'.format(y, inp.geterror()))
+            rows.append(np.asarray(row).reshape(spec.width, spec.nchannels)[::step])
+        return np.stack(rows)
+    finally:
+        inp.close()
+
+def expected_range(from_cs, to_cs, src_is_float):
+    ''' Return (min, max) of values expected from converting from_cs to to_cs '''
+    inf = float('inf')
+    low, high = VERIFY_RANGES.get((from_cs, to_cs), (-inf, inf))
+    if src_is_float and to_cs != 'Output - sRGB':
+        # float sources go above 1, float data maps can also be negative
+        low = -inf if from_cs == 'Utility - Raw' else low
+        high = VERIFY_HALF_MAX
+    return low, high
+
+def expected_mean(src_samples, from_cs, to_cs):
+    ''' Return output mean expected from sampled source pixels, None if the transform is not modelled '''
+    model = VERIFY_MEAN_MODELS.get((from_cs, to_cs))
+    if not model:
+        return
+    np = get_sampler_modules()[1]
+    if model == 'srgb':
+        src_samples = np.clip(src_samples, 0.0, None)
+        src_samples = np.where(src_samples <= 0.04045, src_samples / 12.92, ((src_samples + 0.055) / 1.055) ** 2.4)
+    return float(np.nanmean(src_samples))
+
+def verify_image(path, src, from_cs, to_cs, src_info=None):
+    ''' Check header and sampled pixel statistics of a written image, return error message or None '''
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return 'empty output'
+    info = probe_image(path)
+    if not info:
+        return 'invalid header'
+    if src_info and (info.width, info.height) != (src_info.width, src_info.height):
+        return 'resolution {}x{} does not match source'.format(info.width, info.height)
+    try:
+        samples = sample_pixels(path)
+    except Exception as e:
+        return 'unreadable pixels: {}'.format(e)
+    if samples is None:
+        return
+    np = get_sampler_modules()[1]
+    num_nan = int(np.isnan(samples).sum())
+    num_inf = int(np.isinf(samples).sum())
+    if num_nan or num_inf:
+        return '{} NaN, {} Inf pixel value(s)'.format(num_nan, num_inf)
+
+    s_min, s_max = float(samples.min()), float(samples.max())
+    # unknown source depth is treated as float, the looser range
+    low, high = expected_range(from_cs, to_cs, not src_info or src_info.is_float)
+    if s_min < low - VERIFY_TOLERANCE or s_max > high + VERIFY_TOLERANCE:
+        return 'values {:.3f}..{:.3f} out of range {}..{}'.format(s_min, s_max, low, high)
+
+    # source is sampled at the same rows and columns, resolution is already checked
+    if s_max > 0.0 and (from_cs, to_cs) not in VERIFY_MEAN_MODELS:
+        return
+    try:
+        src_samples = sample_pixels(src)
+    except Exception:
+        return
+    if src_samples is None or src_samples.shape[:2] != samples.shape[:2]:
+        return
+    if s_max <= 0.0:  # black output is only valid for black source
+        if float(np.nanmax(src_samples)) > 0.0:
+            return 'all black output'
+        return
+    # compare color channels only, alpha is passed through
+    channels = min(3, samples.shape[2], src_samples.shape[2])
+    s_mean = float(samples[:, :, :channels].mean())
+    e_mean = expected_mean(src_samples[:, :, :channels], from_cs, to_cs)
+    if abs(s_mean - e_mean) > max(e_mean * VERIFY_MEAN_TOLERANCE, VERIFY_MEAN_MIN_DEVIATION):
+        return 'mean {:.3f} differs from {:.3f} expected from source'.format(s_mean, e_mean)
+
+def decode_thumbnail(path, size=THUMB_SIZE):
+    ''' Return QImage preview of LDR image path fit in size '''
+    reader = QtGui.QImageReader(path)
+    src_size = reader.size()
+    if src_size.isValid():
+        reader.setScaledSize(src_size.scaled(size, size, QtCore.Qt.KeepAspectRatio))
+    image = reader.read()
+    if not image.isNull():
+        return image
+
+class ThumbnailCache(object):
+    ''' On-disk PNG thumbnails keyed by path+mtime, least recently used are evicted over max size '''
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self.total_size = None
+        self.lock = threading.Lock()
+
+    def cache_path(self, path, mtime):
+        key = hashlib.md5('{}|{}'.format(path, mtime).encode('utf-8')).hexdigest()
+        return '{}/{}.png'.format(self.directory, key)
+
+    def get(self, path, mtime):
+        cache_path = self.cache_path(path, mtime)
+        if not os.path.exists(cache_path):
+            return
+        image = QtGui.QImage(cache_path)
+        if image.isNull():
+            return
+        # file mtime of cached thumbnail is its last used time
+        try:
+            os.utime(cache_path, None)
+        except OSError:
+            pass
+        return image
+
+    def put(self, path, mtime, image):
+        self.store(path, mtime, lambda cache_path: image.save(cache_path, 'PNG'))
+
+    def store(self, path, mtime, write):
+        ''' Add thumbnail of path written by write(cache path), which returns success '''
+        if not os.path.exists(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:  # made by another thread
+                pass
+        cache_path = self.cache_path(path, mtime)
+        if not write(cache_path):
+            return
+        with self.lock:
+            if self.total_size is None:
+                self.total_size = sum([e[1] for e in self.entries()])
+            else:
+                self.total_size += os.path.getsize(cache_path)
+            if self.total_size > self.max_size:
+                self.evict()
+
+    def entries(self):
+        ''' Return [(last used time, size, path)] of cached thumbnails '''
+        entries = []
+        for fn in os.listdir(self.directory):
+            fp = '{}/{}'.format(self.directory, fn)
+            try:
+                st = os.stat(fp)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, fp))
+        return entries
+
+    def evict(self):
+        # remove least recently used down to 80% so eviction doesn't run on every put
+        entries = sorted(self.entries())
+        total = sum([e[1] for e in entries])
+        for last_used, size, fp in entries:
+            if total <= self.max_size * 0.8:
+                break
+            try:
+                os.remove(fp)
+                total -= size
+            except OSError:
+                pass
+        self.total_size = total
+
+class ThumbnailLoader(object):
+    ''' Load thumbnails in background threads, in the order of the latest request.
+        HDR previews are decoded by the batch backend, notify((message, level)) reports once if it can't run '''
+    def __init__(self, cache, callback, notify):
+        self.cache = cache
+        self.callback = callback
+        self.backend = ThumbnailBackend(notify)
+        self.queue = []  # [(path, mtime)]
+        self.requested = set()
+        self.threads = []
+        self.loading = 0
+        self.condition = threading.Condition()
+
+    def request(self, items):
+        ''' Replace pending requests with items [(path, mtime)] in priority order '''
+        with self.condition:
+            self.queue = [i for i in items if i not in self.requested]
+            if not self.threads:
+                for n in range(THUMB_THREADS):
+                    thread = threading.Thread(target=self.run)
+                    thread.daemon = True
+                    thread.start()
+                    self.threads.append(thread)
+            self.condition.notify_all()
+
+    def reset(self):
+        with self.condition:
+            self.queue = []
+            self.requested = set()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.queue:
+                    # don't keep the backend running between requests
+                    if not self.loading:
+                        self.backend.stop()
+                    self.condition.wait()
+                item = self.queue.pop(0)
+                self.requested.add(item)
+                self.loading += 1
+            path, mtime = item
+            # any error is only a missing thumbnail, the thread keeps serving the queue
+            try:
+                self.load(path, mtime)
+            except Exception as e:
+                logger.debug('Cannot load thumbnail {}: {}'.format(path, e))
+            finally:
+                with self.condition:
+                    self.loading -= 1
+
+    def load(self, path, mtime):
+        image = self.cache.get(path, mtime)
+        if image is None:
+            ext = os.path.splitext(path)[-1].lower()
+            if ext in THUMB_SOURCE_CS:
+                # OIIO may not be importable in the host app, the backend writes the preview into the cache
+                write = lambda cache_path: self.backend.decode(path, THUMB_SOURCE_CS[ext], cache_path, THUMB_SIZE)
+                self.cache.store(path, mtime, write)
+                image = self.cache.get(path, mtime)
+            else:
+                image = decode_thumbnail(path)
+                if image is not None:
+                    self.cache.put(path, mtime, image)
+            if image is None:
+                return
+        self.callback((path, image))
+
+# calibrated: {(from_cs, to_cs): writer settings of run_oiio}, mismatch: transforms the backend can't reproduce
+_batch_backend = {'available': True, 'calibrated': {}, 'mismatch': set()}
+
+def get_batch_python():
+    ''' Return python interpreter to run the batch backend, can be overridden with ACES_CONVERTER_PYTHON '''
+    python = os.environ.get('ACES_CONVERTER_PYTHON')
+    if python:
+        return python
+    if config.isMaya or config.isNuke:  # sys.executable is the host app
+        return '{}/core/rf_lib/python/2.7.11/python.exe'.format(os.environ.get('RFSCRIPT'))
+    return sys.executable
+
+def get_ocio_config():
+    ''' Return OCIO config path passed to the batch backend, can be overridden with ACES_CONVERTER_OCIO '''
+    return os.environ.get('ACES_CONVERTER_OCIO') or os.environ.get('OCIO')
+
+def _write_batch_jobs(stdin, jobs, reference):
+    try:
+        if reference:
+            src, dst, from_cs, to_cs = jobs[0]
+            stdin.write(json.dumps({'src': reference[0], 'ref': reference[1], 'from': from_cs, 'to': to_cs}) + '\n')
+        for src, dst, from_cs, to_cs in jobs:
+            stdin.write(json.dumps({'src': src, 'dst': dst, 'from': from_cs, 'to': to_cs}) + '\n')
+            stdin.flush()
+        stdin.close()
+    except (IOError, OSError, ValueError):  # backend exited, its unfinished jobs are returned as remaining
+        pass
+
+def is_batch_calibrated(transform):
+    return transform in _batch_backend['calibrated']
+
+def start_batch_backend(colorspaces, args=()):
+    ''' Start the batch backend with OCIO config loaded and colorspaces checked, return process ready for jobs.
+        raise RuntimeError if it can't run '''
+    ocio_config = get_ocio_config()
+    if not ocio_config:
+        raise RuntimeError('No OCIO config set')
+    cmd = [get_batch_python(), BATCH_SCRIPT, '--config', ocio_config]
+    for cs in sorted(set(colorspaces)):
+        cmd += ['--colorspace', cs]
+    cmd += list(args)
+    env = dict(os.environ)
+    env['OCIO'] = str(ocio_config)
+    creationflags = 0x08000000 if os.name == 'nt' else 0  # CREATE_NO_WINDOW
+    devnull = open(os.devnull, 'w')
+    try:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull, env=env,
+                                universal_newlines=True, creationflags=creationflags)
+    except (IOError, OSError) as e:
+        raise RuntimeError('Cannot start batch backend: {}'.format(e))
+    finally:
+        devnull.close()
+    try:
+        message = json.loads(proc.stdout.readline())
+    except (IOError, OSError, ValueError):
+        message = {'error': 'backend exited'}
+    if not message.get('ready'):
+        proc.stdin.close()
+        proc.stdout.close()
+        proc.wait()
+        raise RuntimeError(message.get('error'))
+    return proc
+
+def convert_colorspace_batch(jobs, on_start, on_result, reference=None):
+    ''' Convert [(src, dst, from_cs, to_cs)] of one transform in one backend process which loads OCIO config once.
+        Output has to match run_oiio, so a transform is batched only once the backend has reproduced
+        reference (src, run_oiio result path) and taken its writer settings.
+        on_start(src) and on_result(src, result path) are called as the backend goes,
+        return srcs of jobs the backend did not convert, they should be converted one by one '''
+    remaining = OrderedDict([(job[0], job) for job in jobs])
+    transform = tuple(jobs[0][2:]) if jobs else None
+    if not jobs or not _batch_backend['available'] or transform in _batch_backend['mismatch']:
+        return list(remaining)
+    settings = _batch_backend['calibrated'].get(transform)
+    if not settings and not reference:
+        return list(remaining)
+    args = ['--format', settings['format'], '--compression', settings['compression']] if settings else []
+    try:
+        proc = start_batch_backend(transform, args)
+    except RuntimeError as e:
+        logger.warning('Batch backend not available, convert file by file: {}'.format(e))
+        _batch_backend['available'] = False
+        return list(remaining)
+
+    writer = None
+    try:
+        # write jobs from another thread while results are read here, so neither pipe fills up
+        writer = threading.Thread(target=_write_batch_jobs, args=(proc.stdin, jobs, None if settings else reference))
+        writer.daemon = True
+        writer.start()
+
+        for line in iter(proc.stdout.readline, ''):
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            src = message.get('src')
+            if 'calibrated' in message:
+                if not message['calibrated']:  # backend exits, everything is left to run_oiio
+                    logger.warning('Batch backend output differs from run_oiio for {} -> {}, convert file by file: {}'.format(
+                                    transform[0], transform[1], message.get('error')))
+                    _batch_backend['mismatch'].add(transform)
+                    break
+                _batch_backend['calibrated'][transform] = message['settings']
+                continue
+            if src not in remaining:
+                continue
+            if 'result' not in message:
+                callback, args = on_start, (src,)
+            elif not message['result']:  # left in remaining to be converted by run_oiio
+                logger.warning('Batch backend failed converting {}: {}'.format(src, message.get('error')))
+                continue
+            else:
+                callback, args = on_result, (src, message['result'])
+            try:
+                callback(*args)
+            except Exception:
+                # error of the caller, not the backend, keep reading and leave the file in remaining
+                logger.exception('Error handling batch message of {}'.format(src))
+                continue
+            # only drop a file once its result is fully handled
+            if callback is on_result:
+                del remaining[src]
+    except (IOError, OSError, ValueError) as e:
+        logger.error('Batch backend stopped: {}'.format(e))
+    finally:
+        # closing stdout makes a backend still writing exit on broken pipe
+        proc.stdout.close()
+        proc.wait()
+        if writer:
+            writer.join()
+    return list(remaining)
+
+class ThumbnailBackend(object):
+    ''' Batch backend process decoding HDR previews, started on first use and kept until stop() '''
+    def __init__(self, notify):
+        self.notify = notify
+        self.proc = None
+        self.error = None  # why the backend can't run, reported once
+        self.lock = threading.Lock()
+
+    def decode(self, path, from_cs, out, size):
+        ''' Write PNG preview of path transformed to THUMB_DISPLAY_CS to out, return success '''
+        with self.lock:
+            if self.error:
+                return False
+            if not self.proc:
+                try:
+                    self.proc = start_batch_backend([from_cs, THUMB_DISPLAY_CS] + list(THUMB_SOURCE_CS.values()))
+                except RuntimeError as e:
+                    self.error = str(e)
+                    self.notify(('HDR thumbnails not available: {}'.format(e), 'error'))
+                    return False
+            job = {'thumb': path, 'out': out, 'size': size, 'from': from_cs, 'to': THUMB_DISPLAY_CS}
+            try:
+                self.proc.stdin.write(json.dumps(job) + '\n')
+                self.proc.stdin.flush()
+                message = json.loads(self.proc.stdout.readline())
+            except (IOError, OSError, ValueError):
+                # backend died, it is restarted by the next request
+                self.close()
+                raise RuntimeError('batch backend exited')
+            if not message.get('result'):
+                raise RuntimeError(message.get('error'))
+            return True
+
+    def stop(self):
+        with self.lock:
+            if self.proc:
+                self.close()
+
+    def close(self):
+        # backend exits at end of stdin
+        for pipe in (self.proc.stdin, self.proc.stdout):
+            try:
+                pipe.close()
+            except (IOError, OSError):
+                pass
+        self.proc.wait()
+        self.proc = None
+
+def format_size(num_bytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024.0:
+            return '{:.1f} {}'.format(num_bytes, unit)
+        num_bytes /= 1024.0
+    return '{:.1f} TB'.format(num_bytes)
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return '{}h {:02d}m'.format(hours, minutes)
+    elif minutes:
+        return '{}m {:02d}s'.format(minutes, seconds)
+    return '{}s'.format(seconds)
 
 class TextureMapTreeWidgetItem(QtWidgets.QTreeWidgetItem):
     def __lt__(self, other):
@@ -109,6 +975,7 @@ class AcesConverter(QtWidgets.QMainWindow):
     overall_progress = QtCore.Signal(tuple)
     item_result_color = QtCore.Signal(tuple)
     item_result_title_color = QtCore.Signal(tuple)
+    thumbnail_ready = QtCore.Signal(tuple)
 
     def __init__(self, parent=None):
         # setup Window
@@ -117,6 +984,8 @@ class AcesConverter(QtWidgets.QMainWindow):
         # app vars
         self.threadpool = QtCore.QThreadPool()
         self.temp_dir = None
+        self.journal = None
+        self.image_stats = {}  # {path: (mtime, size, ImageInfo)}
         self.directory = os.path.expanduser('~')
         self.hdr = 'HDR'
         self.ldr = 'Color'
@@ -133,6 +1002,20 @@ class AcesConverter(QtWidgets.QMainWindow):
                                     (self.hdr, ('Utility - Linear - sRGB', 'ACES - ACEScg')), 
                                     (self.plate, ('Output - sRGB', 'ACES - ACEScg')), 
                                     (self.outSRGB, ('ACES - ACEScg', 'Output - sRGB'))])
+        # peak memory multiplier of each map type, LUT based transforms need extra buffers
+        self.memory_factor = OrderedDict([(self.raw, 1.0), 
+                                    (self.ldr, 1.0), 
+                                    (self.hdr, 1.25), 
+                                    (self.plate, 1.25), 
+                                    (self.outSRGB, 1.5)])
+        self.convert_lock = threading.Lock()
+        self.ext_icons = {}  # {ext: QIcon}
+        self.thumb_items = {}  # {path: group item}
+        self.thumb_loader = ThumbnailLoader(ThumbnailCache(THUMB_DIR, THUMB_CACHE_MAX_MB * 1024 * 1024), 
+                                            self.thumbnail_ready.emit, self.progress_status.emit)
+        self.thumb_timer = QtCore.QTimer(self)
+        self.thumb_timer.setSingleShot(True)
+        self.thumb_timer.setInterval(THUMB_REQUEST_DELAY)
         self.extensions = OrderedDict([("sRGB Images", ['*.png', '*.jpg', '*.jpeg', '*.tif', '*.tiff']), 
                                         ("HDR Images", ['*.exr', '*.hdr']), 
                                         ("All Files", ['*.*'])])
@@ -243,6 +1126,10 @@ class AcesConverter(QtWidgets.QMainWindow):
         self.filter_comboBox.setMinimumWidth(125)
         self.input_layout.addWidget(self.filter_comboBox, 1, 1, 1, 1)
 
+        self.verify_checkBox = QtWidgets.QCheckBox('Verify output')
+        self.verify_checkBox.setChecked(True)
+        self.input_layout.addWidget(self.verify_checkBox, 1, 2, 1, 2)
+
         # self.header_layout.setStretch(0, 0)
         # self.header_layout.setStretch(0, 5)
         # ----- view layout
@@ -254,6 +1141,7 @@ class AcesConverter(QtWidgets.QMainWindow):
         self.tree_widget.setColumnCount(3)
         self.tree_widget.setSortingEnabled(True)
         self.tree_widget.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.tree_widget.setIconSize(QtCore.QSize(THUMB_ICON_SIZE, THUMB_ICON_SIZE))
         header_item = self.tree_widget.headerItem()
         header_item.setText(0, "Name")
         header_item.setText(1, "Details")
@@ -288,7 +1176,7 @@ class AcesConverter(QtWidgets.QMainWindow):
         self.file_progressbar.setMinimum(0)
         self.file_progressbar.setMaximum(100)
         self.file_progressbar.setValue(0)
-        self.progress_layout.addRow('Current', self.file_progressbar)
+        self.progress_layout.addRow('Files', self.file_progressbar)
 
         self.overall_progressbar = QtWidgets.QProgressBar()
         self.overall_progressbar.setMaximumHeight(23)
@@ -320,9 +1208,10 @@ class AcesConverter(QtWidgets.QMainWindow):
         self.browse_button.setToolTip('Browse for texture directory')
         self.opendir_button.setToolTip('Open current directory in explorer')
         self.filter_comboBox.setToolTip('Select specific image type to show in viewer')
+        self.verify_checkBox.setToolTip('Check header and sampled pixels of each written file, retry bad ones')
         self.tree_widget.setToolTip('Select texture item(s) to be used in conversion')
         self.convert_button.setToolTip('Click to convert selected textures')
-        self.file_progressbar.setToolTip('Progress of current convert item')
+        self.file_progressbar.setToolTip('Progress of converted files')
         self.overall_progressbar.setToolTip('The overall progress of conversion')
 
     def init_signals(self):
@@ -342,6 +1231,13 @@ class AcesConverter(QtWidgets.QMainWindow):
         self.overall_progress.connect(self.update_overall_progressbar)
         self.item_result_color.connect(self.set_item_result_color)
         self.item_result_title_color.connect(self.set_item_result_title_color)
+        self.thumbnail_ready.connect(self.set_thumbnail)
+
+        # thumbnails
+        self.tree_widget.verticalScrollBar().valueChanged.connect(self.schedule_thumbnails)
+        self.tree_widget.itemExpanded.connect(self.schedule_thumbnails)
+        self.tree_widget.itemCollapsed.connect(self.schedule_thumbnails)
+        self.thumb_timer.timeout.connect(self.request_thumbnails)
 
     def focusOutEvent(self):
         pass
@@ -428,8 +1324,26 @@ class AcesConverter(QtWidgets.QMainWindow):
             file_groups[group_name].append(file)
             self.progress_status.emit(('Resolving file names: {}/{}'.format(i+1, num_files), 'working'))
 
+        # read image headers in parallel
+        self.progress_status.emit(('Reading image headers...', 'working'))
+        pool = ThreadPool(min(PROBE_THREADS, num_files))
+        try:
+            stats = pool.map(get_image_stat, all_files)
+        finally:
+            pool.close()
+        self.image_stats.update(zip(all_files, stats))
+
         return file_groups
 
+    def get_ext_icon(self, ext):
+        if ext not in self.ext_icons:
+            extMap = file_widget.Icon.extMap
+            iconWidget = QtGui.QIcon()
+            iconPath = extMap.get(ext, extMap['unknown'])
+            iconWidget.addPixmap(QtGui.QPixmap(iconPath), QtGui.QIcon.Normal, QtGui.QIcon.Off)
+            self.ext_icons[ext] = iconWidget
+        return self.ext_icons[ext]
+
     def populate_finished(self, file_groups):
         self.show_status('Updating UI...', level='working')
         mode_tooltips = '\n'.join(['Data: Maps describes data (Normal, Displacement, Roughness and others)', 
@@ -449,7 +1363,13 @@ class AcesConverter(QtWidgets.QMainWindow):
             # set group name
             group_item.setText(0, group_name)
             file_str = 'file(s)' if len(files) > 1 else 'file'
-            group_item.setText(1, '{} {}'.format(len(files), file_str))
+            details = '{} {}'.format(len(files), file_str)
+            infos = set([self.image_stats.get(f, (None, None, None))[2] for f in files])
+            if len(infos) == 1 and None not in infos:
+                details += ', {}'.format(describe_image_info(infos.pop()))
+            elif len(infos) > 1:
+                details += ', mixed'
+            group_item.setText(1, details)
             group_item.setFont(1, self.italic_font)
             group_item.setForeground(1, self.grey_brush)
 
@@ -486,10 +1406,8 @@ class AcesConverter(QtWidgets.QMainWindow):
 
             # set icon
             fn, ext = os.path.splitext(files[0])
-            iconWidget = QtGui.QIcon()
-            iconPath = Icon.extMap.get(ext.lower(), Icon.extMap['unknown'])
-            iconWidget.addPixmap(QtGui.QPixmap(iconPath), QtGui.QIcon.Normal, QtGui.QIcon.Off)
-            group_item.setIcon(0, iconWidget)
+            group_item.setIcon(0, self.get_ext_icon(ext.lower()))
+            self.thumb_items[files[0]] = group_item
             for file in files:
                 fn, ext = os.path.splitext(file)
                 file_item = TextureMapTreeWidgetItem(group_item)
@@ -498,10 +1416,17 @@ class AcesConverter(QtWidgets.QMainWindow):
                 file_item.setData(QtCore.Qt.UserRole, 0, file)
                 # set filename
                 file_item.setText(0, os.path.basename(file))
-                # set modified time
-                time_stamp = os.path.getmtime(file)
+                # set resolution and modified time
+                time_stamp, size, info = self.image_stats.get(file, (None, None, None))
+                if time_stamp is None:
+                    time_stamp = os.path.getmtime(file)
                 mod_time = datetime.fromtimestamp(time_stamp).strftime('%y/%m/%d %H:%M:%S')
-                file_item.setText(1, mod_time)
+                if info:
+                    file_item.setText(1, '{}  {}'.format(describe_image_info(info), mod_time))
+                else:
+                    file_item.setText(1, mod_time)
+                if size is not None:
+                    file_item.setToolTip(1, format_size(size))
 
                 # font color
                 file_item.setFont(0, self.italic_font)
@@ -515,10 +1440,77 @@ class AcesConverter(QtWidgets.QMainWindow):
         self.set_ui_enabled(True)
         self.show_status('Populate finished', level='success')
         QtWidgets.QApplication.restoreOverrideCursor()
+        self.check_unfinished_convert()
+
+    def check_unfinished_convert(self):
+        # a running batch owns the journal of its directory
+        if self.journal:
+            return
+        journal = ConvertJournal(self.directory)
+        if not journal.exists():
+            return
+        try:
+            header, num_files, file_paths = journal.unfinished()
+        except (IOError, OSError, KeyError) as e:
+            logger.warning('Cannot read convert journal {}: {}'.format(journal.path, e))
+            return
+        # files of map types no longer available can't be resumed
+        file_paths = OrderedDict([(t, d) for t, d in file_paths.items() if d['mode'] in self.map_func])
+        num_remaining = sum([len(d['files']) for d in file_paths.values()])
+        if num_remaining:
+            qmsgBox = QtWidgets.QMessageBox(self)
+            qmsgBox.setWindowTitle('Resume')
+            qmsgBox.setText('Previous conversion in this directory did not finish.\n'
+                            '{} of {} file(s) were published.\n'
+                            'Resume converting the remaining {} file(s)?'.format(num_files - num_remaining, num_files, num_remaining))
+            qmsgBox.setDetailedText('\n'.join(['- {}\n  {} File(s), Type: {}'.format(t, len(d['files']), d['mode']) 
+                                                for t, d in file_paths.items()]))
+            qmsgBox.setIcon(QtWidgets.QMessageBox.Question)
+            qmsgBox.addButton('  Resume  ', QtWidgets.QMessageBox.AcceptRole)
+            qmsgBox.addButton('  Discard  ', QtWidgets.QMessageBox.RejectRole)
+            answer = qmsgBox.exec_()
+        else:
+            answer = 1
+
+        # temp of the interrupted batch is never reused
+        old_temp = header.get('temp_dir')
+        if old_temp and os.path.exists(old_temp):
+            shutil.rmtree(old_temp, ignore_errors=True)
+        if answer == 1:
+            journal.remove()
+            return
+        self.start_convert(file_paths)
         
 
     def clear(self):
+        self.thumb_loader.reset()
+        self.thumb_items = {}
         self.tree_widget.clear()
+        self.image_stats = {}
+
+    def schedule_thumbnails(self, *args):
+        # restart timer so only the last of a burst of scroll events requests thumbnails
+        self.thumb_timer.start()
+
+    def request_thumbnails(self):
+        ''' Queue thumbnails of group rows on screen first, then the next page '''
+        tree = self.tree_widget
+        max_y = tree.viewport().height() * 2
+        items = []
+        item = tree.itemAt(0, 0)
+        while item and tree.visualItemRect(item).top() < max_y:
+            if not item.parent():
+                path = item.data(QtCore.Qt.UserRole, 0)[0]
+                mtime = self.image_stats.get(path, (None, None, None))[0]
+                items.append((path, mtime))
+            item = tree.itemBelow(item)
+        self.thumb_loader.request(items)
+
+    def set_thumbnail(self, args):
+        path, image = args
+        item = self.thumb_items.get(path)
+        if item:
+            item.setIcon(0, QtGui.QIcon(QtGui.QPixmap.fromImage(image)))
 
     def change_convert_mode(self, curr_item, index):
         curr_item.setSortData(2, index)
@@ -554,6 +1546,7 @@ class AcesConverter(QtWidgets.QMainWindow):
                 group_item.setSelected(False)
             else:
                 group_item.setHidden(False)
+        self.schedule_thumbnails()
     
     def thread_convert(self):
         sels = self.tree_widget.selectedItems()
@@ -584,15 +1577,32 @@ class AcesConverter(QtWidgets.QMainWindow):
                     file_paths[title]['files'].append(item_path)
 
         detailedText = 'List of file(s) to convert\n'
+        total_size = 0
+        total_time = 0.0
+        longest_time = 0.0
         for title, file_data in file_paths.items():
             mode = file_data['mode']
             paths = file_data['files']
+            des_ext = self.ext_map[mode]
+            group_size = 0
+            group_time = 0.0
+            for path in paths:
+                size, seconds = estimate_output(self.image_stats.get(path, (None, None, None))[2], des_ext)
+                group_size += size
+                group_time += seconds
+                longest_time = max(longest_time, seconds)
+            total_size += group_size
+            total_time += group_time
             detailedText += '- {}\n  {} File(s), Type: {}'.format(title, len(paths), mode)
-            num_files = len(paths)
+            detailedText += '\n  Output: ~{}, ~{}'.format(format_size(group_size), format_duration(group_time))
             detailedText += '\n'
+        # files run in parallel, memory budget permitting
+        total_time = max(total_time / MAX_CONVERT_WORKERS, longest_time)
 
         qmsgBox = QtWidgets.QMessageBox(self)
-        qmsgBox.setText('Click "Show Details..." to see convert list.\nStart conversion?')
+        qmsgBox.setText('Click "Show Details..." to see convert list.\n'
+                        'Estimated output: ~{}, ~{}\n'
+                        'Start conversion?'.format(format_size(total_size), format_duration(total_time)))
         qmsgBox.setWindowTitle('Confirm')
         qmsgBox.setDetailedText(detailedText)
         qmsgBox.setIcon(QtWidgets.QMessageBox.Question)
@@ -601,11 +1611,15 @@ class AcesConverter(QtWidgets.QMainWindow):
         answer = qmsgBox.exec_()
         if answer == 1: 
             return
+        self.start_convert(file_paths)
 
+    def start_convert(self, file_paths):
         # prepare args for convert function
         self.show_status('Preparing to convert...', level='working')
         func_args = []
         self.temp_dir = tempfile.mkdtemp().replace('\\', '/') 
+        self.journal = ConvertJournal(self.directory)
+        self.journal.start(self.temp_dir, file_paths)
         is_writable = file_utils.is_writable(self.dir_lineEdit.text())
         num_srcs = len(file_paths)
 
@@ -619,7 +1633,7 @@ class AcesConverter(QtWidgets.QMainWindow):
                 ext_path = '{}/{}{}'.format(self.temp_dir, fn, des_ext)
                 dest_paths.append(ext_path)
             from_cs, to_cs = self.map_func[mode]
-            func_args.append([title, src_paths, dest_paths, from_cs, to_cs])
+            func_args.append([title, mode, src_paths, dest_paths, from_cs, to_cs])
 
         QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
         self.show_status('Converting texture maps...', level='working')
@@ -628,50 +1642,176 @@ class AcesConverter(QtWidgets.QMainWindow):
         self.file_progressbar.setTextVisible(True)
         self.overall_progressbar.setTextVisible(True)
 
-        worker = thread_pool.Worker(self.convert, func_args, is_writable, num_srcs)
+        verify = self.verify_checkBox.isChecked()
+        worker = thread_pool.Worker(self.convert, func_args, is_writable, num_srcs, verify)
         worker.signals.result.connect(self.convert_finished)
         self.threadpool.start(worker)
 
-    def convert(self, func_args, is_writable, num_srcs):
-        result = True
-        i = 0
-        errors = []
-        for title, srcs, dests, from_cs, to_cs in func_args:
-            progress_txt = '({}/{})'.format(i+1, num_srcs)
-            self.progress_title.emit(title)
-            self.item_result_title_color.emit((title, None))
-            convert_results = []
-            m = 0
-            batch_result = True
-            num_imgs = len(srcs)
-            copy_func = shutil.copy2 if is_writable else admin.copyfile
+    def convert(self, func_args, is_writable, num_srcs, verify):
+        copy_func = shutil.copy2 if is_writable else admin.copyfile
+        jobs = []
+        num_files = 0
+        groups = OrderedDict()  # {title: {'total': n, 'started': n, 'done': n, 'result': bool}}
+        for title, mode, srcs, dests, from_cs, to_cs in func_args:
+            groups[title] = {'total': len(srcs), 'started': 0, 'done': 0, 'result': True}
+            num_files += len(srcs)
+            group_jobs = []
             for src, dst in zip(srcs, dests):
-                filename = os.path.basename(src)
-                self.item_result_color.emit((title, filename, None))
-                self.progress_status.emit(('Converting {}: {}'.format(progress_txt, filename), 'working'))
+                info = self.image_stats.get(src, (None, None, None))[2]
+                estimate = estimate_memory(info, self.memory_factor[mode])
+                group_jobs.append((estimate, (title, src, dst, from_cs, to_cs), is_batchable(info)))
+            # batch whole groups only, so files of one UDIM set all go through the same backend
+            if not all([b for e, j, b in group_jobs]):
+                jobs.extend([(e, (False, [j])) for e, j, b in group_jobs])
+                continue
+            # even chunk sizes, so no chunk is left with a single file
+            num_chunks = (len(group_jobs) + BATCH_CHUNK_SIZE - 1) // BATCH_CHUNK_SIZE
+            chunk_size = (len(group_jobs) + num_chunks - 1) // num_chunks
+            for c in range(0, len(group_jobs), chunk_size):
+                chunk = group_jobs[c:c + chunk_size]
+                # a batch converts its files one after another, it needs the memory of the biggest one
+                jobs.append((max([e for e, j, b in chunk]), (True, [j for e, j, b in chunk])))
+
+        state = {'started': 0, 'converted': 0, 'groups_done': 0, 'num_files': num_files, 'num_srcs': num_srcs, 
+                'groups': groups, 'errors': [], 'verify': verify, 'progress_txt': {}, 
+                'finished': set()}
+        scheduler = MemoryScheduler(jobs, MEMORY_BUDGET_MB * 1024 * 1024)
+        num_workers = min(MAX_CONVERT_WORKERS, len(jobs))
+        logger.debug('Converting {} file(s) in {} job(s) with {} worker(s), memory budget {} MB'.format(num_files, len(jobs), num_workers, MEMORY_BUDGET_MB))
+        threads = []
+        for n in range(num_workers):
+            thread = threading.Thread(target=self.convert_worker, args=(scheduler, state, copy_func))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        errors = state['errors']
+        return not errors, errors
+
+    def convert_worker(self, scheduler, state, copy_func):
+        while True:
+            estimate, job = scheduler.acquire()
+            if job is None:
+                return
+            batched, files = job
+            try:
+                self.convert_files(files, state, copy_func, batched)
+            except Exception as e:
+                # keep the worker alive, report files of the job it didn't finish as failed
+                logger.exception('Error converting {}'.format(', '.join([job[1] for job in files])))
+                for job in files:
+                    if job[1] in state['finished']:
+                        continue
+                    if job[1] not in state['progress_txt']:
+                        self.start_file(job, state)
+                    self.finish_file(job, state, 'error: {}'.format(e))
+            finally:
+                scheduler.release(estimate)
+
+    def convert_files(self, files, state, copy_func, batched):
+        if batched:
+            jobs = OrderedDict([(job[1], job) for job in files])
+            on_start = lambda src: self.start_file(jobs[src], state)
+            on_result = lambda src, result: self.convert_file(jobs[src], state, copy_func, batch_result=result)
+            reference = None
+            if not is_batch_calibrated(tuple(files[0][3:])):
+                # first file goes through run_oiio, its output is what the backend has to reproduce
+                job, files = files[0], files[1:]
+                result = self.convert_file(job, state, copy_func)
+                if result:
+                    reference = (job[1], result)
+            remaining = convert_colorspace_batch([job[1:] for job in files], on_start, on_result, reference)
+            # a file whose result handling failed half way may have been finished already
+            files = [jobs[src] for src in remaining if src not in state['finished']]
+
+        for job in files:
+            self.convert_file(job, state, copy_func)
+
+    def start_file(self, job, state):
+        title, src = job[:2]
+        filename = os.path.basename(src)
+        group = state['groups'][title]
+        with self.convert_lock:
+            state['started'] += 1
+            progress_txt = '({}/{})'.format(state['started'], state['num_files'])
+            state['progress_txt'][src] = progress_txt
+            group['started'] += 1
+            if group['started'] == 1:
+                self.progress_title.emit(title)
+                self.item_result_title_color.emit((title, None))
+        self.item_result_color.emit((title, filename, None))
+        self.progress_status.emit(('Converting {}: {}'.format(progress_txt, filename), 'working'))
+        self.journal.record(src, ConvertJournal.CONVERTING)
+
+    def convert_file(self, job, state, copy_func, batch_result=None):
+        ''' Convert, publish and verify a started file, batch_result is the output already converted by the batch backend.
+            Return the converted temp file if it was published '''
+        title, src, dst, from_cs, to_cs = job
+        filename = os.path.basename(src)
+        if src not in state['progress_txt']:
+            self.start_file(job, state)
+        progress_txt = state['progress_txt'][src]
+        num_attempts = VERIFY_RETRIES + 1 if state['verify'] else 1
+        for attempt in range(num_attempts):
+            if attempt:
+                self.progress_status.emit(('Retrying {}: {}, {}'.format(progress_txt, filename, error), 'working'))
+                self.journal.record(src, ConvertJournal.CONVERTING)
+            if attempt or batch_result is None:
                 convert_result = run_oiio.convert_colorspace_oiio(src, dst, from_cs, to_cs)
-
-                if not convert_result:
-                    self.progress_status.emit(('Error converting {}: {}'.format(progress_txt, filename), 'error'))
-                    result = False
-                    batch_result = False
-                    self.item_result_color.emit((title, filename, False))
-                    errors.append(filename)
-                else:  # copy result
-                    self.progress_status.emit(('Convert success {}: {}'.format(progress_txt, filename), 'success'))
-                    src_dir = os.path.dirname(src)
-                    res_fn = os.path.basename(convert_result)
-                    des = '{}/{}'.format(src_dir, res_fn)
-                    copy_func(convert_result, des)
-                    self.item_result_color.emit((title, filename, True))
-                m += 1
-                self.file_progress.emit((m, num_imgs))
-
-            i += 1
-            self.overall_progress.emit((i, num_srcs))
-            self.item_result_title_color.emit((title, batch_result))
-            
-        return result, errors
+            else:
+                convert_result = batch_result
+            error = self.publish_file(src, convert_result, from_cs, to_cs, copy_func, state['verify'])
+            if not error:
+                break
+            logger.warning('{} attempt {}/{}: {}'.format(src, attempt + 1, num_attempts, error))
+        self.finish_file(job, state, error)
+        return None if error else convert_result
+
+    def finish_file(self, job, state, error):
+        title, src = job[:2]
+        filename = os.path.basename(src)
+        group = state['groups'][title]
+        progress_txt = state['progress_txt'][src]
+        success = not error
+        if success:
+            self.journal.record(src, ConvertJournal.PUBLISHED)
+            self.progress_status.emit(('Convert success {}: {}'.format(progress_txt, filename), 'success'))
+        else:
+            self.journal.record(src, ConvertJournal.FAILED)
+            self.progress_status.emit(('Error converting {}: {}, {}'.format(progress_txt, filename, error), 'error'))
+        self.item_result_color.emit((title, filename, success))
+
+        with self.convert_lock:
+            state['finished'].add(src)
+            state['converted'] += 1
+            group['done'] += 1
+            if not success:
+                group['result'] = False
+                state['errors'].append('{} ({})'.format(filename, error))
+            self.file_progress.emit((state['converted'], state['num_files']))
+            if group['done'] == group['total']:
+                state['groups_done'] += 1
+                self.overall_progress.emit((state['groups_done'], state['num_srcs']))
+                self.item_result_title_color.emit((title, group['result']))
+
+    def publish_file(self, src, convert_result, from_cs, to_cs, copy_func, verify):
+        ''' Copy converted temp file next to src and verify it, return error message or None '''
+        if not convert_result:
+            return 'conversion failed'
+        self.journal.record(src, ConvertJournal.CONVERTED)
+
+        src_dir = os.path.dirname(src)
+        res_fn = os.path.basename(convert_result)
+        des = '{}/{}'.format(src_dir, res_fn)
+        try:
+            copy_func(convert_result, des)
+        except (IOError, OSError) as e:
+            logger.error('Cannot copy {} to {}: {}'.format(convert_result, des, e))
+            return 'publish failed'
+        if verify:
+            src_info = self.image_stats.get(src, (None, None, None))[2]
+            return verify_image(des, src, from_cs, to_cs, src_info)
 
     def convert_finished(self, results):
         result, errors = results
@@ -680,6 +1820,10 @@ class AcesConverter(QtWidgets.QMainWindow):
         self.set_ui_enabled(True)
         self.reset_progressbars()
         qmsgBox = QtWidgets.QMessageBox(self)
+        # batch is done, failed files are reported below instead of resumed
+        if self.journal:
+            self.journal.remove()
+            self.journal = None
         # clear temp
         if os.path.exists(self.temp_dir):
             self.show_status('Removing temp: {}'.format(self.temp_dir), 'working')
@@ -772,11 +1916,26 @@ class AcesConverter(QtWidgets.QMainWindow):
 
     def set_ui_enabled(self, enabled):
         self.dir_lineEdit.setReadOnly(not enabled)
+        self.browse_button.setEnabled(enabled)
+        self.current_scene_button.setEnabled(enabled)
         self.filter_comboBox.setEnabled(enabled)
+        self.verify_checkBox.setEnabled(enabled)
         self.convert_button.setEnabled(enabled)
 
+_window = None  # window kept alive between launches inside host apps
+
 def show():
+    global _window
+    start_time = time.time()
     bg = 'background-image:url("{}/icons/aces_bg.png");'.format(moduleDir)
+    if (config.isMaya or config.isNuke) and _window is not None and QtCompat.isValid(_window):
+        # reuse hidden window with its last scan instead of building a new one
+        _window.showNormal()
+        _window.raise_()
+        _window.activateWindow()
+        logger.debug('Reuse window in {:.3f}s'.format(time.time() - start_time))
+        return _window
+
     if config.isMaya:
         from rftool.utils.ui import maya_win
         logger.info('Run in Maya\n')
@@ -784,6 +1943,7 @@ def show():
         myApp = AcesConverter(parent=maya_win.getMayaWindow())
         myApp.tree_widget.setStyleSheet(bg)
         myApp.show()
+        _window = myApp
     elif config.isNuke:
         from rf_nuke import nuke_win 
         logger.info('Run in Nuke\n')
@@ -791,6 +1951,7 @@ def show():
         myApp = AcesConverter(parent=nuke_win._nuke_main_window())
         myApp.tree_widget.setStyleSheet(bg)
         myApp.show()
+        _window = myApp
     else:
         logger.info('Run in standalone\n')
         app = QtWidgets.QApplication.instance()
@@ -800,8 +1961,10 @@ def show():
         myApp.show()
         stylesheet.set_default(app)
         myApp.tree_widget.setStyleSheet(bg)
+        logger.debug('Open window in {:.3f}s'.format(time.time() - start_time))
         sys.exit(app.exec_())
     
+    logger.debug('Open window in {:.3f}s'.format(time.time() - start_time))
     return myApp
 
 if __name__ == '__main__':
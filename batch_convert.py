@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+''' Batch colorspace conversion backend of ACES Converter.
+    Loads the OCIO config once, then converts every job read from stdin.
+    usage : batch_convert.py --config path --colorspace name [--colorspace name ...] [--format type --compression name]
+    stdin : one JSON job per line {"src": path, "dst": path, "from": colorspace, "to": colorspace}
+            a job with "ref": path is a reference, see below
+            {"thumb": path, "out": png path, "size": n, "from": colorspace, "to": colorspace} writes a preview
+            and is answered with {"thumb": path, "result": png path or null}
+    stdout: one JSON message per line, {"ready": true} or {"error": msg} on start,
+            {"src": path, "state": "converting"} before and {"src": path, "result": path or null} after each job
+
+    Output must look exactly like what run_oiio writes. The app converts the first file of each transform with
+    run_oiio and sends its output as reference. The reference src is converted here and compared with it, then
+    its pixel format and compression are used for every following write and sent back as
+    {"src": path, "calibrated": true, "settings": {"format": type, "compression": name}}. The app passes the
+    settings to later backends with --format/--compression. If the pixels differ, e.g. $OCIO is another config
+    version than run_oiio uses, {"calibrated": false} is sent and the backend exits.
+'''
+import sys
+import os
+import json
+import argparse
+
+oiio = None
+# allowed difference from the reference, covers 8-bit quantization
+CALIBRATE_MEAN_ERROR = 0.002
+CALIBRATE_MAX_ERROR = 0.02
+writer = {'format': None, 'compression': None}
+
+def send(message):
+    sys.stdout.write(json.dumps(message) + '\n')
+    sys.stdout.flush()
+
+def convert(src, from_cs, to_cs):
+    buf = oiio.ImageBuf(src)
+    result = oiio.ImageBufAlgo.colorconvert(buf, from_cs, to_cs)
+    if result.has_error:
+        raise RuntimeError(result.geterror())
+    return result
+
+def write(result, dst):
+    if not writer['format']:
+        raise RuntimeError('Writer settings are not calibrated')
+    if writer['compression']:
+        result.specmod().attribute('compression', writer['compression'])
+    if not result.write(dst, writer['format']):
+        raise RuntimeError(result.geterror())
+
+def calibrate(job):
+    ''' Compare conversion of job src with reference written by run_oiio, adopt its writer settings '''
+    result = convert(job['src'], job['from'], job['to'])
+    ref = oiio.ImageBuf(job['ref'])
+    spec = ref.spec()
+    if ref.has_error:
+        raise RuntimeError(ref.geterror())
+    if (spec.width, spec.height) != (result.spec().width, result.spec().height):
+        raise RuntimeError('Resolution differs from reference')
+    comp = oiio.ImageBufAlgo.compare(result, ref, CALIBRATE_MAX_ERROR, CALIBRATE_MEAN_ERROR)
+    if comp.meanerror > CALIBRATE_MEAN_ERROR or comp.maxerror > CALIBRATE_MAX_ERROR:
+        raise RuntimeError('Pixels differ from reference, mean error {:.4f}, max error {:.4f}'.format(comp.meanerror, comp.maxerror))
+    writer['format'] = str(spec.format)
+    writer['compression'] = spec.getattribute('compression') or ''
+    return dict(writer)
+
+def thumbnail(job):
+    ''' Write 8-bit RGB preview of job thumb fit in size '''
+    buf = oiio.ImageBuf(job['thumb'])
+    spec = buf.spec()
+    if buf.has_error:
+        raise RuntimeError(buf.geterror())
+    scale = float(job['size']) / max(spec.width, spec.height)
+    width, height = max(1, int(spec.width * scale)), max(1, int(spec.height * scale))
+    small = oiio.ImageBufAlgo.resize(buf, roi=oiio.ROI(0, width, 0, height, 0, 1, 0, spec.nchannels))
+    # drop alpha, grey images are repeated to RGB for the display transform
+    rgb = oiio.ImageBufAlgo.channels(small, (0, 1, 2) if spec.nchannels >= 3 else (0, 0, 0))
+    preview = oiio.ImageBufAlgo.colorconvert(rgb, job['from'], job['to'])
+    if preview.has_error or not preview.write(job['out'], 'uint8'):
+        raise RuntimeError(preview.geterror())
+
+def main():
+    global oiio
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--config', required=True)
+    parser.add_argument('--colorspace', action='append', default=[])
+    parser.add_argument('--format')
+    parser.add_argument('--compression')
+    args = parser.parse_args()
+    writer['format'] = args.format
+    writer['compression'] = args.compression
+
+    try:
+        # colorconvert uses the default config, make it the given one
+        os.environ['OCIO'] = args.config
+        import OpenImageIO
+        oiio = OpenImageIO
+        config = oiio.ColorConfig(args.config)
+        # OIIO falls back to a built-in config without ACES colorspaces when the config can't be loaded
+        names = set(config.getColorSpaceNames())
+        missing = [cs for cs in args.colorspace if cs not in names]
+        if missing:
+            raise RuntimeError('Colorspace(s) not in OCIO config {}: {}'.format(args.config, ', '.join(missing)))
+    except Exception as e:
+        send({'error': str(e)})
+        return 1
+    send({'ready': True})
+
+    for line in iter(sys.stdin.readline, ''):
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        if 'thumb' in job:
+            try:
+                thumbnail(job)
+                send({'thumb': job['thumb'], 'result': job['out']})
+            except Exception as e:
+                send({'thumb': job['thumb'], 'result': None, 'error': str(e)})
+            continue
+        if 'ref' in job:
+            try:
+                send({'src': job['src'], 'calibrated': True, 'settings': calibrate(job)})
+            except Exception as e:
+                send({'src': job['src'], 'calibrated': False, 'error': str(e)})
+                return 1
+            continue
+        send({'src': job['src'], 'state': 'converting'})
+        try:
+            write(convert(job['src'], job['from'], job['to']), job['dst'])
+            send({'src': job['src'], 'result': job['dst']})
+        except Exception as e:
+            send({'src': job['src'], 'result': None, 'error': str(e)})
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())